@@ -2,7 +2,7 @@ from pathlib import Path
 
 import click
 
-from notebooktester.main import NotebookTester
+from notebooktester.main import EXECUTORS, NotebookTester
 
 
 @click.command()
@@ -18,21 +18,49 @@ from notebooktester.main import NotebookTester
     type=click.Path(),
     help="Cache directory for test results",
 )
+@click.option(
+    "--executor",
+    "-e",
+    default="process",
+    type=click.Choice(EXECUTORS),
+    help="Run notebooks in parallel processes, threads, or as tasks on a single event loop",
+)
+@click.option(
+    "--reuse-kernels",
+    is_flag=True,
+    help="Keep one kernel per worker alive and reset it between notebooks",
+)
+@click.option(
+    "--validate",
+    is_flag=True,
+    help="Validate notebooks against the nbformat schema before running them",
+)
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
 @click.option(
     "--force", "-f", is_flag=True, help="Ignore cache and force test execution"
 )
 def main(
-    path: str, timeout: int, workers: int, cache_dir: str, verbose: bool, force: bool
+    path: str,
+    timeout: int,
+    workers: int,
+    cache_dir: str,
+    executor: str,
+    reuse_kernels: bool,
+    validate: bool,
+    verbose: bool,
+    force: bool,
 ):
-    tester = NotebookTester(
+    with NotebookTester(
         dir=Path(path),
         timeout=timeout,
         cache_dir=Path(cache_dir) if cache_dir else None,
         verbose=verbose,
         force=force,
-    )
-    tester.run_tests(max_workers=workers)
+        executor=executor,
+        reuse_kernels=reuse_kernels,
+        validate=validate,
+    ) as tester:
+        tester.run_tests(max_workers=workers)
 
 
 if __name__ == "__main__":
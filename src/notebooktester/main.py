@@ -1,22 +1,147 @@
+import ast
 import asyncio
+import atexit
+import hashlib
 import inspect
 import json
+import mmap
 import multiprocessing
+import os
 import signal
+import sqlite3
+import stat
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import asdict, dataclass
+from collections import OrderedDict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
-import nbformat
 from loguru import logger
-from nbclient import NotebookClient
 from tqdm import tqdm
 
+if TYPE_CHECKING:
+    import nbclient
+    import nbformat
+    from jupyter_client.manager import AsyncKernelManager
+    from nbformat import NotebookNode
 
-@dataclass
+    NotebookClient: type[nbclient.NotebookClient]
+else:
+    # imported on first use by _import_jupyter, see there
+    nbformat = AsyncKernelManager = NotebookClient = None
+
+# loguru refuses to re-register an existing level, e.g. after a module reload
+try:
+    logger.level("TIMEOUT", no=20, color="<yellow>")
+except (TypeError, ValueError):
+    pass
+try:
+    # at SUCCESS level, so progress shows on the default console sink
+    logger.level("PROGRESS", no=25, color="<cyan>")
+except (TypeError, ValueError):
+    pass
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    from blake3 import blake3 as _content_hash  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - optional speedup
+    # blake2b is the fastest digest in hashlib on 64-bit platforms
+    def _content_hash():
+        return hashlib.blake2b(digest_size=32)
+
+
+def _import_jupyter() -> None:
+    """Import the jupyter stack on first use.
+
+    It dominates the import time of this module, and neither the CLI's --help
+    nor a fully cached run needs it.
+    """
+    global nbformat, AsyncKernelManager, NotebookClient
+    if nbformat is None:
+        import nbformat
+    if AsyncKernelManager is None:
+        from jupyter_client.manager import AsyncKernelManager
+    if NotebookClient is None:
+        from nbclient import NotebookClient as _NotebookClient
+        from nbclient.exceptions import CellTimeoutError
+
+        class _OutputlessNotebookClient(_NotebookClient):
+            """NotebookClient that drops outputs as they arrive.
+
+            The executed notebook is never saved, so a cell's outputs (images,
+            dataframes) are not even built. Failures are raised from the execute
+            reply, which does not need them.
+            """
+
+            def output(self, outs, msg, display_id, cell_index):
+                return None
+
+            async def async_execute_cell(self, *args, **kwargs):
+                try:
+                    return await super().async_execute_cell(*args, **kwargs)
+                except CellTimeoutError:
+                    # the cell is still running: interrupt and kill the kernel
+                    # instead of asking it to shut down and waiting for that
+                    self.shutdown_kernel = "immediate"
+                    raise
+
+        NotebookClient = _OutputlessNotebookClient
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_load_file(path: Path):
+    """Parse a JSON file.
+
+    orjson parses straight from a read-only memory map, so a large notebook
+    is never copied onto the heap as one bytes object first.
+    """
+    with open(path, "rb") as f:
+        if orjson is None:
+            return json.loads(f.read())
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be mapped
+            return orjson.loads(b"")
+        with mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+@dataclass(frozen=True, slots=True)
 class NotebookStats:
     notebook_path: Path
     last_modified: float
@@ -25,6 +150,12 @@ class NotebookStats:
     timeout: int
     execution_time: float
     cached: bool
+    code_hash: str = ""
+    size: int = 0
+
+    @property
+    def timed_out(self) -> bool:
+        return not self.success and "A cell timed out" in self.message
 
     def to_dict(self):
         # Convert the dataclass to a dict, with Path converted to string
@@ -32,12 +163,17 @@ class NotebookStats:
         d["notebook_path"] = str(d["notebook_path"])
         return d
 
-    def save_to_cache(self, cache_file: Path):
-        with cache_file.open("w") as f:
-            json.dump(self.to_dict(), f)
+    @classmethod
+    def from_dict(cls, d: dict) -> "NotebookStats":
+        d = dict(d)
+        d["notebook_path"] = Path(d["notebook_path"])
+        # orjson serializes inf (a failed run) as null
+        if d["execution_time"] is None:
+            d["execution_time"] = float("inf")
+        return cls(**d)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TestResult:
     notebook_path: Path
     success: bool
@@ -49,6 +185,504 @@ class GracefulExit(Exception):
     pass
 
 
+class CacheEntry(NamedTuple):
+    """The columns needed to decide whether, and in which order, to re-run"""
+
+    last_modified: float
+    success: bool
+    timeout: int
+    timed_out: bool
+    code_hash: str
+    execution_time: float
+    size: int
+
+
+class ResultCache:
+    """Single-file SQLite index of NotebookStats, keyed by cache key.
+
+    The small decision columns of every entry are read in one query on the
+    first lookup, so checking a notebook is a dict lookup; the full stats are
+    decoded only when a cached result is actually reported. Workers that only
+    write results never read the index. WAL mode lets parallel workers write
+    to the same file. The most recently decoded stats are kept in memory.
+    """
+
+    SCHEMA_VERSION = 4
+    # decoded stats kept in memory; enough for repeated lookups within a run
+    MEMORY_SIZE = 256
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode this only syncs at checkpoints, not on every result written
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._entries: Optional[Dict[str, CacheEntry]] = None
+        self._memory: OrderedDict[str, NotebookStats] = OrderedDict()
+
+    def _migrate(self) -> None:
+        """Create the table; results cached by an older layout are dropped"""
+        (version,) = self._db.execute("PRAGMA user_version").fetchone()
+        if version != self.SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS results")
+            self._db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, last_modified REAL NOT NULL, "
+            "success INTEGER NOT NULL, timeout INTEGER NOT NULL, "
+            "timed_out INTEGER NOT NULL, code_hash TEXT NOT NULL, "
+            "execution_time REAL NOT NULL, size INTEGER NOT NULL, "
+            "json BLOB NOT NULL)"
+        )
+
+    def _load_entries(self) -> Dict[str, CacheEntry]:
+        with self._lock:
+            if self._entries is None:
+                self._entries = {
+                    key: CacheEntry(
+                        last_modified,
+                        bool(success),
+                        timeout,
+                        bool(timed_out),
+                        code_hash,
+                        execution_time,
+                        size,
+                    )
+                    for key, last_modified, success, timeout, timed_out, code_hash, execution_time, size in self._db.execute(
+                        "SELECT key, last_modified, success, timeout, timed_out, "
+                        "code_hash, execution_time, size FROM results"
+                    )
+                }
+            return self._entries
+
+    def entry(self, key: str) -> Optional[CacheEntry]:
+        entries = self._entries
+        if entries is None:
+            entries = self._load_entries()
+        return entries.get(key)
+
+    def load(self, key: str) -> Optional[NotebookStats]:
+        """Decode the full cached stats for key, marked as cached"""
+        with self._lock:
+            stats = self._memory.get(key)
+            if stats is not None:
+                self._memory.move_to_end(key)
+                return stats
+            row = self._db.execute(
+                "SELECT json FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                d = _json_loads(row[0])
+            except ValueError:
+                logger.debug(f"Ignoring corrupt cache entry {key}")
+                return None
+            d["cached"] = True
+            stats = NotebookStats.from_dict(d)
+            self._memory[key] = stats
+            if len(self._memory) > self.MEMORY_SIZE:
+                self._memory.popitem(last=False)
+            return stats
+
+    def _remember(self, key: str, stats: NotebookStats) -> None:
+        self._memory.pop(key, None)
+        if self._entries is not None:
+            self._entries[key] = CacheEntry(
+                stats.last_modified,
+                stats.success,
+                stats.timeout,
+                stats.timed_out,
+                stats.code_hash,
+                stats.execution_time,
+                stats.size,
+            )
+
+    def remember(self, key: str, stats: NotebookStats) -> None:
+        """Update the in-memory view for stats another connection has stored"""
+        with self._lock:
+            self._remember(key, stats)
+
+    def put(self, key: str, stats: NotebookStats) -> None:
+        with self._lock:
+            self._remember(key, stats)
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, last_modified, success, "
+                "timeout, timed_out, code_hash, execution_time, size, json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    stats.last_modified,
+                    stats.success,
+                    stats.timeout,
+                    stats.timed_out,
+                    stats.code_hash,
+                    stats.execution_time,
+                    stats.size,
+                    _json_dumps(stats.to_dict()),
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+EXECUTORS = ("thread", "process", "async")
+
+
+def _default_workers(n_notebooks: int) -> int:
+    """Workers for n notebooks when none are requested.
+
+    A worker mostly waits on its kernel subprocess, so this oversubscribes the
+    CPUs like ThreadPoolExecutor's default, but never starts more workers than
+    there are notebooks to run.
+    """
+    return min(64, max(4, (os.cpu_count() or 1) + 4), max(1, n_notebooks))
+
+
+# shuts down kernels of blocking (non-async) kernel managers; its single
+# thread is only started on first use
+_shutdown_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="kernel-shutdown"
+)
+
+
+async def _shutdown_kernel(km: "AsyncKernelManager") -> None:
+    await km.shutdown_kernel(now=True)
+
+
+# handler ids of the configured loguru sinks, see _setup_logging
+_log_handlers: Dict[str, int] = {}
+_console_verbose: Optional[bool] = None
+
+
+def _setup_logging(verbose: bool) -> None:
+    """Configure structured logging once per process.
+
+    Later testers only swap the console sink when their verbosity differs.
+    """
+    global _console_verbose
+    if not _log_handlers:
+        log_path = Path("logs/")
+        log_path.mkdir(parents=True, exist_ok=True)
+        log_file = log_path / "notebookstests.log"
+
+        # Remove default logger
+        logger.remove()
+
+        _log_handlers["file"] = logger.add(log_file, level="DEBUG")
+    elif _console_verbose == verbose:
+        return
+
+    if "console" in _log_handlers:
+        logger.remove(_log_handlers["console"])
+    _log_handlers["console"] = logger.add(
+        sys.stderr, level="SUCCESS" if not verbose else "DEBUG"
+    )
+    _console_verbose = verbose
+
+
+class _ProgressLog:
+    """Stand-in for tqdm when stderr is not a terminal.
+
+    A progress bar written to a pipe or CI log is just noise, so this only
+    counts and logs a progress line every `interval` seconds and at the end.
+    """
+
+    def __init__(self, total: int, interval: float = 10.0):
+        self.total = total
+        self.n = 0
+        self.interval = interval
+        self._last_log = time.monotonic()
+
+    def update(self, n: int = 1) -> None:
+        self.n += n
+        now = time.monotonic()
+        if now - self._last_log >= self.interval:
+            self._last_log = now
+            logger.log("PROGRESS", f"{self.n}/{self.total} notebooks done")
+
+    def __enter__(self) -> "_ProgressLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.n:
+            logger.log("PROGRESS", f"{self.n}/{self.total} notebooks done")
+
+
+@dataclass(frozen=True)
+class TesterConfig:
+    """Picklable subset of the tester settings that workers need"""
+
+    dir: Path
+    timeout: int
+    cache_dir: Path
+    verbose: bool
+    force: bool
+    reuse_kernels: bool
+    validate: bool
+
+
+def _read_notebook(notebook_path: Path, validate: bool = False) -> "NotebookNode":
+    """Load a notebook for execution.
+
+    The fast path skips nbformat's schema validation and keeps only the code
+    cells, without their stored outputs, since nothing else is needed to
+    re-run a notebook. Pass validate=True to go through nbformat.read instead.
+    """
+    _import_jupyter()
+    if validate:
+        with open(notebook_path) as f:
+            return nbformat.read(f, as_version=4)
+
+    raw = _json_load_file(notebook_path)
+    code_cells = []
+    for cell in raw.get("cells", []):
+        # markdown and raw cells (and their attachments) are never executed
+        if cell.get("cell_type") != "code":
+            continue
+        # sources are stored as a list of lines on disk
+        if isinstance(cell.get("source"), list):
+            cell["source"] = "".join(cell["source"])
+        cell["outputs"] = []
+        cell["execution_count"] = None
+        code_cells.append(cell)
+    if "cells" in raw:
+        raw["cells"] = code_cells
+    # both are typed as possibly returning a list, for a list input
+    nb = cast("NotebookNode", nbformat.from_dict(raw))
+    if nb.get("nbformat") != 4:
+        nb = cast("NotebookNode", nbformat.convert(nb, 4))
+    return nb
+
+
+def _code_hash(nb: "NotebookNode") -> str:
+    """Hash the code cells, the only part of a notebook that affects a run"""
+    h = _content_hash()
+    for cell in nb.cells:
+        if cell.cell_type == "code":
+            h.update(cell.source.encode())
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def _file_code_hash(notebook_path: Path) -> str:
+    """_code_hash straight from the file, without building an nbformat node"""
+    raw = _json_load_file(notebook_path)
+    if raw.get("nbformat") != 4:
+        # older formats keep their cells elsewhere
+        return _code_hash(_read_notebook(notebook_path))
+    h = _content_hash()
+    for cell in raw.get("cells", []):
+        if cell.get("cell_type") == "code":
+            source = cell.get("source", "")
+            if isinstance(source, list):
+                source = "".join(source)
+            h.update(source.encode())
+            h.update(b"\0")
+    return h.hexdigest()
+
+
+def _cell_number(notebook_path: Path, code_index: int) -> int:
+    """Position (from 1, counting every cell) of a notebook's code_index-th
+    code cell, as a user would count it in the file"""
+    with open(notebook_path) as f:
+        cells = nbformat.read(f, as_version=4).cells
+    code_cells = [i for i, cell in enumerate(cells) if cell.cell_type == "code"]
+    return code_cells[code_index] + 1
+
+
+def _syntax_error(nb: "NotebookNode", notebook_path: Path) -> Optional[str]:
+    """Describe the first code cell that can't compile, without a kernel.
+
+    Cells nbclient would skip, or whose errors it allows, are not checked.
+    """
+    skip_tags = {"raises-exception", NotebookClient.skip_cells_with_tag.default_value}
+    code_cells = [cell for cell in nb.cells if cell.cell_type == "code"]
+    for code_index, cell in enumerate(code_cells):
+        if skip_tags.intersection(cell.metadata.get("tags", [])):
+            continue
+        try:
+            ast.parse(cell.source)
+            continue
+        except SyntaxError:
+            pass
+        # only cells that fail as plain python may use magics or shell escapes
+        try:
+            from IPython.core.inputtransformer2 import TransformerManager
+        except ImportError:
+            return None
+        try:
+            ast.parse(TransformerManager().transform_cell(cell.source))
+        except SyntaxError as e:
+            number = _cell_number(notebook_path, code_index)
+            return f"SyntaxError in cell {number}: {e}"
+    return None
+
+
+@lru_cache(maxsize=None)
+def _kernel_runs_this_python(kernel_name: str) -> bool:
+    """Whether the kernel runs the interpreter running this code.
+
+    Only then does a cell that fails to parse here fail in the kernel too; a
+    newer kernel may accept syntax this interpreter doesn't.
+    """
+    from jupyter_client.kernelspec import KernelSpecManager
+
+    try:
+        argv = KernelSpecManager().get_kernel_spec(kernel_name).argv
+    except Exception as e:
+        logger.debug(f"Could not look up kernel {kernel_name}: {e}")
+        return False
+    if not argv:
+        return False
+    # jupyter_client starts these with sys.executable, see format_kernel_cmd
+    if argv[0] in {
+        "python",
+        "python%i" % sys.version_info[0],
+        "python%i.%i" % sys.version_info[:2],
+    }:
+        return True
+    return os.path.realpath(argv[0]) == os.path.realpath(sys.executable)
+
+
+# never hold notebooks worth testing, so discovery doesn't descend into them
+SKIP_DIRS = frozenset({".ipynb_checkpoints", ".git", ".hg", ".svn", "__pycache__"})
+
+
+# directory -> (st_mtime_ns, subdirectories, notebook paths) from its last listing
+_listing_cache: Dict[str, Tuple[int, List[str], List[str]]] = {}
+
+# directories changed this recently are not remembered: on filesystems with
+# coarse timestamps a later change could keep the same mtime
+_LISTING_MIN_AGE = 2.0
+
+
+def _scan_directory(
+    directory: str,
+) -> Tuple[List[str], List[Tuple[Path, float, int]]]:
+    """List one directory: (subdirectories, (notebook, mtime, size) triples).
+
+    Adding, removing or renaming an entry changes a directory's mtime, so a
+    directory whose mtime is unchanged since the last call is not listed
+    again; only its notebooks are stat'ed, since editing a file in place
+    leaves the directory mtime alone. Like Path.rglob, a directory that
+    can't be read is skipped instead of failing the whole walk.
+    """
+    try:
+        dir_mtime_ns = os.stat(directory).st_mtime_ns
+        cached = _listing_cache.get(directory)
+        if cached is not None and cached[0] == dir_mtime_ns:
+            notebooks = []
+            for path in cached[2]:
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                notebooks.append((Path(path), st.st_mtime, st.st_size))
+            return cached[1], notebooks
+
+        subdirs, notebooks = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".ipynb"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    notebooks.append((Path(entry.path), st.st_mtime, st.st_size))
+    except OSError as e:
+        logger.debug(f"Skipping unreadable directory {directory}: {e}")
+        return [], []
+    if time.time() - dir_mtime_ns / 1e9 >= _LISTING_MIN_AGE:
+        _listing_cache[directory] = (
+            dir_mtime_ns,
+            subdirs,
+            [os.fspath(path) for path, _, _ in notebooks],
+        )
+    return subdirs, notebooks
+
+
+def _walk_notebooks(
+    directory: Path, max_workers: int = 8
+) -> List[Tuple[Path, float, int]]:
+    """Find (notebook, mtime, size) triples below directory.
+
+    Directories are listed concurrently, which hides per-directory latency on
+    network filesystems. Checkpoint and VCS dirs (SKIP_DIRS) are skipped
+    without entering them.
+    """
+    found: List[Tuple[Path, float, int]] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_directory, os.fspath(directory))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, notebooks = future.result()
+                found.extend(notebooks)
+                pending.update(pool.submit(_scan_directory, d) for d in subdirs)
+    return found
+
+
+@lru_cache(maxsize=4096)
+def _cache_key(absolute_path: str) -> str:
+    """Stable cache key for an absolute notebook path.
+
+    Callers make the path absolute first (os.path.abspath is a pure string
+    operation, unlike Path.resolve() which lstats every path component), so
+    the memoized key never depends on the current directory.
+    """
+    return hashlib.blake2b(os.fsencode(absolute_path), digest_size=16).hexdigest()
+
+
+_worker_tester: Optional[Tuple[TesterConfig, "NotebookTester"]] = None
+
+
+def _get_worker_tester(config: TesterConfig) -> "NotebookTester":
+    """Return this worker process's tester, rebuilding it if the config changed"""
+    global _worker_tester
+    if _worker_tester is None or _worker_tester[0] != config:
+        _worker_tester = (config, NotebookTester(**asdict(config)))
+    return _worker_tester[1]
+
+
+def _init_worker(config: TesterConfig) -> None:
+    """Prepare a worker process before it receives notebooks.
+
+    The parent handles Ctrl-C, workers are shut down by the executor. The
+    jupyter stack is imported here, and with reuse_kernels the worker's kernel
+    is started too, so both overlap with the other workers instead of delaying
+    the first notebook.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _import_jupyter()
+    tester = _get_worker_tester(config)
+    if config.reuse_kernels:
+        tester.start_worker_kernel()
+
+
+def _run_notebook(
+    notebook_path: Path, mtime: float, size: int, cache_key: str
+) -> NotebookStats:
+    """Run a single notebook inside an executor worker.
+
+    The worker's tester was built from the config by _init_worker, so the
+    (unpicklable) parent instance never has to cross the process boundary
+    and each task only pickles its own few fields. The parent has already
+    checked the cache, so the worker goes straight to executing the notebook.
+    """
+    assert _worker_tester is not None, "worker was not initialized"
+    return _worker_tester[1]._run_and_store(notebook_path, mtime, size, cache_key)
+
+
 class NotebookTester:
     def __init__(
         self,
@@ -57,42 +691,44 @@ class NotebookTester:
         cache_dir: Path = Path(".notebookcache"),
         verbose: bool = False,
         force: bool = False,
+        executor: str = "process",
+        reuse_kernels: bool = False,
+        validate: bool = False,
     ):
         self.notebooks_dir = Path(dir)
         self.timeout = timeout
         self.verbose = verbose
         self.cache_dir = cache_dir
         self.force = force
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f"Unknown executor {executor!r}, expected one of {EXECUTORS}"
+            )
+        self.executor_kind = executor
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = ResultCache(self.cache_dir / "cache.sqlite")
 
         self.executor = None
         self.successful = 0
         self.failed = 0
         self.no_more_time = 0
         self.interrupted = False
-        self._setup_logging()
-
-        # signal handler
-        signal.signal(signal.SIGTERM, self._signal_handler)
-        signal.signal(signal.SIGINT, self._signal_handler)
-
-    def _setup_logging(self):
-        """Configure structured logging"""
-        log_path = Path("logs/")
-        log_path.mkdir(parents=True, exist_ok=True)
-        log_file = log_path / "notebookstests.log"
-
-        # Remove default logger
-        logger.remove()
-
-        # Add TIMEOUT level if it doesn't exist
-        if "TIMEOUT" not in logger._core.levels:  # type: ignore
-            logger.level("TIMEOUT", no=20, color="<yellow>")
-
-        # Add handlers
-        logger.add(log_file, level="DEBUG")
-        logger.add(sys.stderr, level="SUCCESS" if not self.verbose else "DEBUG")
+        self.reuse_kernels = reuse_kernels
+        self.validate = validate
+        # per worker thread: one event loop and (optionally) a pool of warm kernels
+        self._local = threading.local()
+        # every pooled kernel manager, with the event loop it runs on
+        self._kernel_managers: Dict[
+            "AsyncKernelManager", asyncio.AbstractEventLoop
+        ] = {}
+        self._kernel_lock = threading.Lock()
+        self._event_loops: List[asyncio.AbstractEventLoop] = []
+        # whether _cleanup_at_exit is registered, it is registered only once
+        self._atexit_registered = False
+        # the task driving the async executor, cancelled on SIGINT/SIGTERM
+        self._run_task: Optional[asyncio.Task] = None
+        _setup_logging(self.verbose)
 
     def _signal_handler(self, signum, _):
         """Handle termination signals gracefully"""
@@ -102,36 +738,129 @@ class NotebookTester:
 
         if self.executor:
             logger.info("Shutting down executor...")
-            self.executor.shutdown(wait=False)
+            self.executor.shutdown(wait=False, cancel_futures=True)
 
         raise GracefulExit()
 
+    def _install_signal_handlers(self) -> Dict[int, Any]:
+        """Install the graceful-exit handlers, returning the ones they replace.
+
+        Signals can only be handled on the main thread, so run_tests called
+        from any other thread leaves the handlers alone.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        previous = {}
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            if signal.getsignal(signum) != self._signal_handler:
+                previous[signum] = signal.signal(signum, self._signal_handler)
+        return previous
+
+    def _cancel_run(self, signum: int) -> None:
+        """Loop signal callback: cancel the async run so its tasks can unwind"""
+        signal_name = signal.Signals(signum).name
+        logger.warning(f"\nReceived {signal_name}. Initiating graceful shutdown...")
+        self.interrupted = True
+        if self._run_task is not None:
+            self._run_task.cancel()
+
+    def _add_loop_signal_handlers(self, **_) -> None:
+        """Route SIGINT/SIGTERM on the running loop to _cancel_run.
+
+        nbclient installs its own loop handlers for every notebook and removes
+        them afterwards, so this is also used as its on_notebook_start hook and
+        called again once each notebook is done.
+        """
+        if self._run_task is None:
+            return
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self._cancel_run, signum)
+            except (NotImplementedError, RuntimeError):
+                # not on the main thread, or no signal support on this platform
+                return
+
+    def _config(self) -> TesterConfig:
+        return TesterConfig(
+            dir=self.notebooks_dir,
+            timeout=self.timeout,
+            cache_dir=self.cache_dir,
+            verbose=self.verbose,
+            force=self.force,
+            reuse_kernels=self.reuse_kernels,
+            validate=self.validate,
+        )
+
+    def _create_executor(self, max_workers: int) -> Executor:
+        if self.executor_kind == "thread":
+            return ThreadPoolExecutor(
+                max_workers=max_workers,
+                initializer=self.start_worker_kernel if self.reuse_kernels else None,
+            )
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._config(),),
+        )
+
     def _get_cache_key(self, notebook_path: Path) -> str:
-        return str(notebook_path.resolve()).replace("/", "_").replace("\\", "_")
+        return _cache_key(os.path.abspath(notebook_path))
 
-    def _should_run_test(self, notebook_path: Path) -> bool:
+    def _get_cached_result(
+        self, notebook_path: Path, cache_key: str, mtime: float, size: int
+    ) -> Optional[NotebookStats]:
+        """Return the cached stats if they can be reused, otherwise None"""
         # if force, alway run
-        if self.force or not self.cache_dir:
-            return True
+        if self.force:
+            return None
 
-        cache_key = self._get_cache_key(notebook_path)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        # if there is no cache entry, always run
+        entry = self.cache.entry(cache_key)
+        if entry is None:
+            return None
 
-        # if there is no cache file, always run
-        if not cache_file.exists():
-            return True
+        # if it timed out last time, and the timeout value didnt increase, dont run
+        if entry.timed_out and entry.timeout >= self.timeout:
+            return self.cache.load(cache_key)
 
-        with open(cache_file) as f:
-            cache = NotebookStats(**json.load(f))
+        # run if failed
+        if not entry.success:
+            return None
 
-        # if it timed out last time, and the timeout value didnt increase, dont run
-        if cache.timeout >= self.timeout and "A cell timed out" in cache.message:
-            return False
+        # unchanged since the last run: the same stat fingerprint as ccache or
+        # make would use, exact so that restoring an older copy is noticed too
+        if mtime == entry.last_modified and size == entry.size:
+            return self.cache.load(cache_key)
 
-        # run if changed, or failed
-        return notebook_path.stat().st_mtime > cache.last_modified or not cache.success
+        # touched, but the code is the same (e.g. only outputs or markdown changed)
+        try:
+            code_hash = _file_code_hash(notebook_path)
+        except (OSError, ValueError):
+            return None
+        if code_hash != entry.code_hash:
+            return None
+        stats = self.cache.load(cache_key)
+        if stats is not None:
+            # remember the new stat so the next check takes the fast path
+            self.cache.put(
+                cache_key,
+                replace(stats, last_modified=mtime, size=size, cached=False),
+            )
+        return stats
 
-    async def _cleanup_notebook_client(self, client: Optional[NotebookClient]) -> None:
+    def _expected_runtime(self, cache_key: str) -> float:
+        """Runtime of the last run; notebooks never run or that failed count as
+        the slowest, since nothing is known about how long they take"""
+        entry = self.cache.entry(cache_key)
+        if entry is None:
+            return float("inf")
+        return entry.execution_time
+
+    async def _cleanup_notebook_client(
+        self, client: Optional["nbclient.NotebookClient"]
+    ) -> None:
         """Clean up notebook client resources asynchronously.
 
         Args:
@@ -160,178 +889,505 @@ class NotebookTester:
             try:
                 if hasattr(km, "shutdown_kernel"):
                     # Add timeout to prevent hanging
-                    await asyncio.wait_for(
-                        asyncio.to_thread(km.shutdown_kernel, now=True), timeout=2.0
-                    )
+                    if inspect.iscoroutinefunction(km.shutdown_kernel):
+                        shutdown = km.shutdown_kernel(now=True)
+                    else:
+                        # blocking managers share one long-lived thread
+                        shutdown = asyncio.get_running_loop().run_in_executor(
+                            _shutdown_executor, partial(km.shutdown_kernel, now=True)
+                        )
+                    await asyncio.wait_for(shutdown, timeout=2.0)
             except asyncio.TimeoutError:
                 logger.warning("Kernel shutdown timed out")
             except Exception as e:
                 logger.debug(f"Error shutting down kernel: {e}")
 
+        kc = getattr(client, "kc", None)
+        km = getattr(client, "km", None)
+
+        # nbclient already cleaned up a kernel it owned, nothing left to do
+        if not kc and not km:
+            return
+        if not km:
+            await _safe_stop_channels(kc)
+            return
+        if not kc:
+            await _safe_shutdown_kernel(km)
+            return
+
         # Run cleanup tasks concurrently
-        await asyncio.gather(
-            _safe_stop_channels(getattr(client, "kc", None)),
-            _safe_shutdown_kernel(getattr(client, "km", None)),
+        await asyncio.gather(_safe_stop_channels(kc), _safe_shutdown_kernel(km))
+
+    def _acquire_kernel(self, kernel_name: str) -> "AsyncKernelManager":
+        """Take an idle kernel manager for kernel_name from this thread's pool.
+
+        A new manager is created when none is idle; nbclient starts its kernel
+        lazily on first use. Pools are per thread because a kernel manager is
+        tied to the event loop that started it.
+        """
+        _import_jupyter()
+        idle: Dict[str, List["AsyncKernelManager"]] = self._local.__dict__.setdefault(
+            "idle_kernels", {}
+        )
+        loop = self._get_event_loop()
+        with self._kernel_lock:
+            pool = idle.get(kernel_name, [])
+            while pool:
+                km = pool.pop()
+                # skip managers already shut down by shutdown_kernels
+                if km in self._kernel_managers:
+                    return km
+            km = AsyncKernelManager(kernel_name=kernel_name)
+            self._register_cleanup_at_exit()
+            self._kernel_managers[km] = loop
+        return km
+
+    def _release_kernel(self, km: "AsyncKernelManager") -> None:
+        """Return a kernel manager to this thread's pool after a clean run"""
+        self._local.idle_kernels.setdefault(km.kernel_name, []).append(km)
+
+    def _discard_kernel(self, km: "AsyncKernelManager") -> None:
+        """Forget a pooled kernel manager; the caller shuts it down"""
+        with self._kernel_lock:
+            self._kernel_managers.pop(km, None)
+
+    async def _reset_kernel(self, client: "nbclient.NotebookClient", cwd: Path) -> None:
+        """Clear the namespace of a reused kernel and move it to the notebook dir"""
+        await client.async_start_new_kernel_client()
+        code = (
+            "%reset -f\nimport gc as _gc, os as _os\n_gc.collect()\n"
+            # absolute, the kernel is still in the previous notebook's directory
+            f"_os.chdir({os.path.abspath(cwd)!r})\ndel _gc, _os"
+        )
+        reply = await client.kc.execute_interactive(  # type: ignore
+            code, store_history=False, timeout=self.timeout
+        )
+        if reply["content"]["status"] != "ok":
+            raise RuntimeError(f"Resetting kernel failed: {reply['content']}")
+
+    async def _start_pooled_kernel(self, km: "AsyncKernelManager") -> None:
+        """Start an acquired kernel and put it in the pool.
+
+        A kernel that fails to start is dropped, the notebook that would
+        have used it starts its own instead.
+        """
+        try:
+            if not km.has_kernel:
+                await km.start_kernel()
+        except Exception as e:
+            logger.warning(f"Could not pre-start a kernel: {e}")
+            self._discard_kernel(km)
+            return
+        self._release_kernel(km)
+
+    async def _prestart_kernels(self, count: int, kernel_name: str = "python3") -> None:
+        """Fill this thread's pool with count started kernels, concurrently"""
+        managers = [self._acquire_kernel(kernel_name) for _ in range(count)]
+        await asyncio.gather(*(self._start_pooled_kernel(km) for km in managers))
+
+    def start_worker_kernel(self, kernel_name: str = "python3") -> None:
+        """Start a pooled kernel for this thread ahead of the first notebook"""
+        self._get_event_loop().run_until_complete(
+            self._prestart_kernels(1, kernel_name)
         )
 
-    async def _execute_notebook(self, notebook_path: Path) -> NotebookStats:
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Return this worker thread's event loop, creating it on first use"""
+        loop = getattr(self._local, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            self._local.loop = loop
+            with self._kernel_lock:
+                self._register_cleanup_at_exit()
+                self._event_loops.append(loop)
+        return loop
+
+    def _register_cleanup_at_exit(self) -> None:
+        """Make sure kernels and loops are cleaned up at exit; call with
+        _kernel_lock held"""
+        if not self._atexit_registered:
+            atexit.register(self._cleanup_at_exit)
+            self._atexit_registered = True
+
+    def _cleanup_at_exit(self) -> None:
+        self.shutdown_kernels()
+        self._close_event_loops()
+
+    def _close_event_loops(self) -> None:
+        with self._kernel_lock:
+            loops, self._event_loops = self._event_loops, []
+        for loop in loops:
+            if loop.is_running() or loop.is_closed():
+                continue
+            # reap anything nbclient left behind before closing the loop
+            leftover = asyncio.all_tasks(loop)
+            for task in leftover:
+                task.cancel()
+            if leftover:
+                loop.run_until_complete(
+                    asyncio.gather(*leftover, return_exceptions=True)
+                )
+            loop.close()
+
+    def shutdown_kernels(self) -> None:
+        """Shut down all kernels kept alive by reuse_kernels"""
+        with self._kernel_lock:
+            managers, self._kernel_managers = self._kernel_managers, {}
+        for km, loop in managers.items():
+            if not km.has_kernel:
+                continue
+            try:
+                if loop.is_closed() or loop.is_running():
+                    asyncio.run(_shutdown_kernel(km))
+                else:
+                    # the loop that started the kernel owns its sockets
+                    loop.run_until_complete(_shutdown_kernel(km))
+            except Exception as e:
+                logger.debug(f"Error shutting down kernel: {e}")
+
+    def close(self) -> None:
+        """Shut down pooled kernels, close event loops and the result cache"""
+        self._cleanup_at_exit()
+        with self._kernel_lock:
+            if self._atexit_registered:
+                atexit.unregister(self._cleanup_at_exit)
+                self._atexit_registered = False
+        self.cache.close()
+
+    def __enter__(self) -> "NotebookTester":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def _execute_notebook(
+        self, notebook_path: Path, mtime: float, size: int
+    ) -> NotebookStats:
         """Execute a single notebook asynchronously"""
         client = None
+        km = None
+        keep_kernel = False
+        code_hash = ""
         try:
-            start_time = time.time()
-            with open(notebook_path) as f:
-                nb = nbformat.read(f, as_version=4)
+            # the first notebook of a worker would otherwise pay for the import
+            _import_jupyter()
+            start_time = time.perf_counter()
+            nb = _read_notebook(notebook_path, validate=self.validate)
+            code_hash = _code_hash(nb)
+            if not any(
+                cell.source.strip() for cell in nb.cells if cell.cell_type == "code"
+            ):
+                # nothing to execute, don't start a kernel for it
+                return NotebookStats(
+                    notebook_path=notebook_path,
+                    last_modified=mtime,
+                    success=True,
+                    message="Success (no code to run)",
+                    timeout=self.timeout,
+                    execution_time=time.perf_counter() - start_time,
+                    cached=False,
+                    code_hash=code_hash,
+                    size=size,
+                )
+            syntax_error = (
+                _syntax_error(nb, notebook_path)
+                if _kernel_runs_this_python("python3")
+                else None
+            )
+            if syntax_error is not None:
+                # can't run, so don't start a kernel to find out
+                return NotebookStats(
+                    notebook_path=notebook_path,
+                    last_modified=mtime,
+                    success=False,
+                    message=syntax_error,
+                    timeout=self.timeout,
+                    execution_time=float("inf"),
+                    cached=False,
+                    code_hash=code_hash,
+                    size=size,
+                )
 
+            km = self._acquire_kernel("python3") if self.reuse_kernels else None
             client = NotebookClient(
                 nb,
+                km=km,
                 timeout=self.timeout,
                 kernel_name="python3",
                 resources={"metadata": {"path": notebook_path.parent}},
+                store_widget_state=False,
+                record_timing=False,
+                on_notebook_start=(
+                    self._add_loop_signal_handlers if self._run_task else None
+                ),
             )
+            if km is not None and km.has_kernel:
+                await self._reset_kernel(client, notebook_path.parent)
 
             await client.async_execute()
+            # a kernel is only handed to the next notebook after a clean run
+            keep_kernel = km is not None
             return NotebookStats(
                 notebook_path=notebook_path,
-                last_modified=notebook_path.stat().st_mtime,
+                last_modified=mtime,
                 success=True,
                 message="Success",
                 timeout=self.timeout,
-                execution_time=time.time() - start_time,
+                execution_time=time.perf_counter() - start_time,
                 cached=False,
+                code_hash=code_hash,
+                size=size,
             )
         except Exception as e:
             return NotebookStats(
                 notebook_path=notebook_path,
-                last_modified=notebook_path.stat().st_mtime,
+                last_modified=mtime,
                 success=False,
                 message=str(e),
                 timeout=self.timeout,
                 execution_time=float("inf"),
                 cached=False,
+                code_hash=code_hash,
+                size=size,
             )
 
         finally:
-            if client:
+            if client and keep_kernel:
+                client.kc.stop_channels()  # type: ignore
+                self._release_kernel(client.km)  # type: ignore
+            elif client:
+                if client.km is not None and not client.owns_km:
+                    self._discard_kernel(client.km)
                 await self._cleanup_notebook_client(client)
+            elif km is not None:
+                self._discard_kernel(km)
+                if km.has_kernel:
+                    await km.shutdown_kernel(now=True)
 
-    def test_notebook(self, notebook_path: Path) -> NotebookStats:
-        """Test a single notebook."""
-        if not self._should_run_test(notebook_path):
-            if self.cache_dir is None:  # Handle the case when cache_dir is None
-                return NotebookStats(
-                    notebook_path=notebook_path,
-                    last_modified=notebook_path.stat().st_mtime,
-                    success=False,
-                    message="No cache dir found",
-                    timeout=self.timeout,
-                    execution_time=float("inf"),
-                    cached=False,
-                )
+    def test_notebook(
+        self,
+        notebook_path: Path,
+        mtime: Optional[float] = None,
+        cache_key: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> NotebookStats:
+        """Test a single notebook.
 
+        Pass the mtime, size and cache key when they are already known from
+        discovery to skip recomputing them.
+        """
+        if mtime is None or size is None:
+            st = os.stat(notebook_path)
+            mtime = st.st_mtime if mtime is None else mtime
+            size = st.st_size if size is None else size
+        if cache_key is None:
             cache_key = self._get_cache_key(notebook_path)
-            try:
-                with open(self.cache_dir / f"{cache_key}.json") as f:
-                    cache = json.load(f)
-                cache["cached"] = True
-                return NotebookStats(**cache)
+        cached = self._get_cached_result(notebook_path, cache_key, mtime, size)
+        if cached is not None:
+            return cached
+        return self._run_and_store(notebook_path, mtime, size, cache_key)
 
-            except Exception as e:
-                return NotebookStats(
-                    notebook_path=notebook_path,
-                    last_modified=notebook_path.stat().st_mtime,
-                    success=False,
-                    message=f"Error reading cache: {e}",
-                    timeout=self.timeout,
-                    execution_time=float("inf"),
-                    cached=False,
-                )
-
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
+    def _run_and_store(
+        self, notebook_path: Path, mtime: float, size: int, cache_key: str
+    ) -> NotebookStats:
+        """Execute a notebook, skipping the cache check, and cache the result"""
+        # Reuse this thread's event loop instead of creating one per notebook
+        loop = self._get_event_loop()
         asyncio.set_event_loop(loop)
 
+        result = loop.run_until_complete(
+            self._execute_notebook(notebook_path, mtime, size)
+        )
+        self.cache.put(cache_key, result)
+        return result
+
+    def _discover_notebooks(self) -> List[Tuple[Path, float, int]]:
+        """Find all notebooks with the mtime and size seen during the walk"""
+        # a single stat tells whether the path is a file, and its mtime and size
         try:
-            # Run the execution in a way that lets us clean up while loop is still running
-            async def run_and_cleanup():
-                try:
-                    result: NotebookStats = await self._execute_notebook(notebook_path)
-                    return result
-                finally:
-                    # Cancel any remaining tasks while loop is still running
-                    for task in asyncio.all_tasks():
-                        if not task.done() and task is not asyncio.current_task():
-                            task.cancel()
-                            try:
-                                await asyncio.wait_for(task, timeout=1.0)
-                            except asyncio.TimeoutError:
-                                pass
-                            except asyncio.CancelledError:
-                                pass
-
-            result = loop.run_until_complete(run_and_cleanup())
-            result.save_to_cache(
-                self.cache_dir / f"{self._get_cache_key(notebook_path)}.json"
-            )
-            return result
-        finally:
-            loop.close()
+            st = os.stat(self.notebooks_dir)
+        except FileNotFoundError:
+            return []
+        if stat.S_ISREG(st.st_mode):
+            return [(self.notebooks_dir, st.st_mtime, st.st_size)]
+        return sorted(_walk_notebooks(self.notebooks_dir))
 
     def find_notebooks(self) -> List[Path]:
         """Find all notebooks in the specified directory"""
-        if self.notebooks_dir.is_file():
-            return [self.notebooks_dir]
-        return sorted(
-            [
-                path
-                for path in self.notebooks_dir.rglob("*.ipynb")
-                if ".ipynb_checkpoints" not in str(path)
-            ]
-        )
+        return [path for path, _, _ in self._discover_notebooks()]
+
+    def _report(self, result: NotebookStats) -> None:
+        """Log a single result and add it to the summary counters"""
+        if result.success:
+            status = "📦✅ CACHED" if result.cached else "✅ PASSED"
+            logger.info(
+                f"{status} - {result.notebook_path}: {result.message} ({result.execution_time:.2f}s)"
+            )
+            self.successful += 1
+        elif result.timed_out:
+            logger.log(
+                "TIMEOUT",
+                f"⏰ TIMEOUT - {result.notebook_path}: {result.message} (>{result.timeout}s)",
+            )
+            self.no_more_time += 1
+        else:
+            logger.error(f"❌ FAILED - {result.notebook_path}: {result.message}")
+            self.failed += 1
+
+    def _run_in_executor(
+        self,
+        notebooks: List[Tuple[Path, float, int, str]],
+        max_workers: int,
+        pbar: Union[tqdm, _ProgressLog],
+    ) -> None:
+        """Execute notebooks on the configured pool, reporting as they finish"""
+        with self._create_executor(max_workers) as executor:
+            self.executor = executor
+            if self.executor_kind == "process":
+                futures = {
+                    executor.submit(_run_notebook, nb, mtime, size, key): key
+                    for nb, mtime, size, key in notebooks
+                }
+            else:
+                futures = {
+                    executor.submit(self._run_and_store, nb, mtime, size, key): key
+                    for nb, mtime, size, key in notebooks
+                }
+
+            pending = set(futures)
+            while pending:
+                # wake up regularly so a stop requested from another thread
+                # (where no signal handler runs) is noticed between batches
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                        if self.executor_kind == "process":
+                            # stored by the worker's own connection
+                            self.cache.remember(futures[future], result)
+                        self._report(result)
+                    except Exception as e:
+                        logger.error(f"Error processing future: {str(e)}")
+                        self.failed += 1
+                pbar.update(len(done))
+                if self.interrupted:
+                    for future in pending:
+                        future.cancel()
+                    raise GracefulExit()
+
+    async def _run_concurrently(
+        self,
+        notebooks: List[Tuple[Path, float, int, str]],
+        max_workers: int,
+        pbar: Union[tqdm, _ProgressLog],
+    ) -> None:
+        """Execute notebooks as tasks on one event loop, at most max_workers at a time"""
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run_one(nb: Path, mtime: float, size: int, key: str) -> NotebookStats:
+            async with semaphore:
+                result = await self._execute_notebook(nb, mtime, size)
+            # nbclient dropped the loop handlers when the notebook finished
+            self._add_loop_signal_handlers()
+            self.cache.put(key, result)
+            return result
+
+        self._run_task = asyncio.current_task()
+        self._add_loop_signal_handlers()
+        tasks: List[asyncio.Future] = []
+        try:
+            if self.reuse_kernels:
+                # one warm kernel for every notebook that can run at once
+                await self._prestart_kernels(min(max_workers, len(notebooks)))
+            tasks = [asyncio.ensure_future(run_one(*job)) for job in notebooks]
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    self._report(await next_done)
+                except Exception as e:
+                    logger.error(f"Error processing task: {str(e)}")
+                    self.failed += 1
+                pbar.update(1)
+        except asyncio.CancelledError:
+            if not self.interrupted:
+                raise
+            raise GracefulExit()
+        finally:
+            # cancelling lets every notebook shut its kernel down before we return
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._run_task = None
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    loop.remove_signal_handler(signum)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            # hand the signals back to the synchronous handlers
+            self._install_signal_handlers()
 
     def run_tests(self, max_workers: Optional[int] = None):
         """Run tests on all notebooks"""
+        self.interrupted = False
+        previous_handlers = self._install_signal_handlers()
         try:
-            notebooks = self.find_notebooks()
-            if not max_workers:
-                max_workers = multiprocessing.cpu_count()
-            logger.info(f"Running tests with {max_workers} workers")
+            notebooks = self._discover_notebooks()
             logger.info(f"Starting notebook tests - found {len(notebooks)} notebooks")
 
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                self.executor = executor
-                futures = {
-                    executor.submit(self.test_notebook, nb): nb for nb in notebooks
-                }
+            # settle cache hits here, only notebooks that need a run hit the pool
+            to_run = []
+            cached = []
+            for nb, mtime, size in notebooks:
+                key = self._get_cache_key(nb)
+                hit = self._get_cached_result(nb, key, mtime, size)
+                if hit is None:
+                    to_run.append((nb, mtime, size, key))
+                else:
+                    cached.append(hit)
+            # longest expected runtime first, so a slow notebook doesn't start
+            # last and keep one worker busy after all the others are done
+            to_run.sort(key=lambda job: self._expected_runtime(job[3]), reverse=True)
+
+            if not max_workers:
+                max_workers = _default_workers(len(to_run))
+            logger.info(
+                f"Running tests with {max_workers} {self.executor_kind} workers"
+            )
 
-                with tqdm(total=len(notebooks), disable=self.verbose) as pbar:
-                    for future in as_completed(futures):
-                        try:
-                            result = future.result()
-                            if result.success:
-                                status = "📦✅ CACHED" if result.cached else "✅ PASSED"
-                                logger.info(
-                                    f"{status} - {result.notebook_path}: {result.message} ({result.execution_time:.2f}s)"
-                                )
-                                self.successful += 1
-                            elif "A cell timed out" in result.message:
-                                logger.log(
-                                    "TIMEOUT",
-                                    f"⏰ TIMEOUT - {result.notebook_path}: {result.message} (>{result.timeout}s)",
-                                )
-                                self.no_more_time += 1
-                            else:
-                                logger.error(
-                                    f"❌ FAILED - {result.notebook_path}: {result.message}"
-                                )
-                                self.failed += 1
-                            pbar.update(1)
-                        except Exception as e:
-                            logger.error(f"Error processing future: {str(e)}")
-                            self.failed += 1
-                            pbar.update(1)
+            if self.verbose:
+                # every result is logged already
+                progress = tqdm(total=len(notebooks), disable=True)
+            elif sys.stderr.isatty():
+                progress = tqdm(
+                    total=len(notebooks),
+                    miniters=max(1, len(notebooks) // 200),
+                    mininterval=0.2,
+                    smoothing=0,
+                )
+            else:
+                progress = _ProgressLog(total=len(notebooks))
+            with progress as pbar:
+                for result in cached:
+                    self._report(result)
+                pbar.update(len(cached))
+
+                if to_run and self.executor_kind == "async":
+                    loop = self._get_event_loop()
+                    asyncio.set_event_loop(loop)
+                    loop.run_until_complete(
+                        self._run_concurrently(to_run, max_workers, pbar)
+                    )
+                elif to_run:
+                    self._run_in_executor(to_run, max_workers, pbar)
 
         except GracefulExit:
             logger.warning("Graceful exit requested")
+        finally:
+            self.executor = None
+            self.shutdown_kernels()
+            self._close_event_loops()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
 
         logger.success(
             f"\nTest Summary: {self.successful} passed, {self.no_more_time} timed out, {self.failed} failed"
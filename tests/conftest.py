@@ -41,10 +41,19 @@ def test_cache_dir():
 @pytest.fixture
 def notebook_tester(test_notebooks_dir, test_cache_dir):
     """Create a NotebookTester instance with short timeout"""
-    tester = NotebookTester(
+    with NotebookTester(
         dir=test_notebooks_dir,
         timeout=1,  # Short timeout for testing
         cache_dir=test_cache_dir,
         verbose=True,
-    )
-    yield tester
+    ) as tester:
+        yield tester
+
+
+@pytest.fixture
+def tmp_tester(tmp_path):
+    """A NotebookTester over tmp_path with its own cache, closed afterwards"""
+    with NotebookTester(
+        dir=tmp_path, timeout=10, cache_dir=tmp_path / ".cache"
+    ) as tester:
+        yield tester
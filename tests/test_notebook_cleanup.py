@@ -81,3 +81,14 @@ async def test_cleanup_with_failing_channels(notebook_tester, mock_notebook_clie
         await notebook_tester._cleanup_notebook_client(mock_notebook_client)
 
     mock_notebook_client.km.shutdown_kernel.assert_called_once_with(now=True)
+
+
+@pytest.mark.asyncio
+async def test_cleanup_with_only_kernel_manager(notebook_tester, mock_notebook_client):
+    """Test cleanup when the channels were already released"""
+    mock_notebook_client.kc = None
+    mock_notebook_client.km.shutdown_kernel = Mock()
+
+    await notebook_tester._cleanup_notebook_client(mock_notebook_client)
+
+    mock_notebook_client.km.shutdown_kernel.assert_called_once_with(now=True)
@@ -1,6 +1,30 @@
 # tests/test_notebooktester.py
 
-from notebooktester.main import NotebookTester
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import nbformat
+import pytest
+from jupyter_client.manager import AsyncKernelManager
+from nbclient.exceptions import CellTimeoutError
+
+from notebooktester import main
+from notebooktester.main import (
+    NotebookStats,
+    NotebookTester,
+    _default_workers,
+    _json_dumps,
+    _json_loads,
+    _read_notebook,
+)
+from tests.helpers.notebook_creator import NotebookCreator
 
 
 def test_basic_notebook_execution(notebook_tester, test_notebooks_dir):
@@ -33,14 +57,25 @@ def test_timeout_handling(notebook_tester, test_notebooks_dir, test_cache_dir):
     assert "timed out" in result.message.lower()
     assert result.execution_time == float("inf")
 
-    patient_tester = NotebookTester(
+    with NotebookTester(
         dir=test_notebooks_dir, timeout=5, cache_dir=test_cache_dir, force=False
-    )
-    result2 = patient_tester.test_notebook(timeout_nb)
+    ) as patient_tester:
+        result2 = patient_tester.test_notebook(timeout_nb)
     assert result2.success is True  # Should succeed with longer timeout
     assert result2.execution_time < result2.timeout
 
 
+def test_timeout_kills_kernel(test_notebooks_dir):
+    """Test that a timed out cell gets its kernel killed, not shut down politely"""
+    main._import_jupyter()
+    nb = _read_notebook(test_notebooks_dir / "timeout.ipynb")
+    client = main.NotebookClient(nb, timeout=1, kernel_name="python3")
+
+    with pytest.raises(CellTimeoutError):
+        asyncio.run(client.async_execute())
+    assert client.shutdown_kernel == "immediate"
+
+
 def test_failing_notebook(notebook_tester, test_notebooks_dir):
     """Test that notebooks with errors fail appropriately"""
     failing_nb = test_notebooks_dir / "failing.ipynb"
@@ -49,6 +84,7 @@ def test_failing_notebook(notebook_tester, test_notebooks_dir):
     assert result.success is False
     assert result.cached is False
     assert result.execution_time == float("inf")
+    assert "ZeroDivisionError" in result.message
 
 
 def test_find_notebooks(notebook_tester):
@@ -67,15 +103,29 @@ def test_find_notebooks(notebook_tester):
 
 def test_batch_execution(test_notebooks_dir, test_cache_dir):
     """Test running multiple notebooks in parallel"""
-    tester = NotebookTester(
+    with NotebookTester(
         dir=test_notebooks_dir, timeout=1, cache_dir=test_cache_dir, force=True
-    )
-    tester.run_tests(max_workers=2)
+    ) as tester:
+        tester.run_tests(max_workers=2)
 
     assert tester.successful >= 1
     assert tester.no_more_time >= 1
 
 
+def test_process_results_update_parent_cache(tmp_path):
+    """Test that results stored by worker processes are seen by the parent"""
+    path = NotebookCreator.create_notebook(["x = 1"], "nb.ipynb", tmp_path)
+    with NotebookTester(
+        dir=tmp_path, timeout=10, cache_dir=tmp_path / ".cache", executor="process"
+    ) as tester:
+        tester.run_tests(max_workers=1)
+        assert tester.successful == 1
+
+        result = tester.test_notebook(path)
+    assert result.cached is True
+    assert result.success is True
+
+
 def test_force_rerun(test_notebooks_dir, test_cache_dir):
     """Test that force=True bypasses cache"""
     # Create two testers - one normal, one forced
@@ -88,9 +138,568 @@ def test_force_rerun(test_notebooks_dir, test_cache_dir):
 
     basic_nb = test_notebooks_dir / "basic.ipynb"
 
-    result2 = normal_tester.test_notebook(basic_nb)
-    assert result2.cached is True  # Second run, should be cached
+    with normal_tester, force_tester:
+        result2 = normal_tester.test_notebook(basic_nb)
+        assert result2.cached is True  # Second run, should be cached
+
+        # Run with force=True
+        result3 = force_tester.test_notebook(basic_nb)
+        assert result3.cached is False  # Should not use cache when forced
+
+
+def test_thread_executor(test_notebooks_dir, test_cache_dir):
+    """Test that the thread executor is still available"""
+    with NotebookTester(
+        dir=test_notebooks_dir,
+        timeout=1,
+        cache_dir=test_cache_dir,
+        force=True,
+        executor="thread",
+    ) as tester:
+        tester.run_tests(max_workers=2)
+
+    assert tester.successful >= 1
+    assert tester.no_more_time >= 1
+
+
+def test_async_executor(test_notebooks_dir, test_cache_dir):
+    """Test running notebooks concurrently on a single event loop"""
+    with NotebookTester(
+        dir=test_notebooks_dir,
+        timeout=1,
+        cache_dir=test_cache_dir,
+        force=True,
+        executor="async",
+    ) as tester:
+        tester.run_tests(max_workers=2)
+        n_notebooks = len(tester.find_notebooks())
+
+    assert tester.successful >= 1
+    assert tester.no_more_time >= 1
+    assert tester.successful + tester.no_more_time + tester.failed == n_notebooks
+
+
+def test_async_executor_interrupt(tmp_path, test_cache_dir):
+    """Test that SIGINT cancels an async run and shuts its kernels down"""
+    NotebookCreator.create_notebook(
+        ["import time\ntime.sleep(30)"], "slow.ipynb", tmp_path
+    )
+    previous = signal.getsignal(signal.SIGINT)
+    timer = threading.Timer(5, os.kill, (os.getpid(), signal.SIGINT))
+    start = time.time()
+    with NotebookTester(
+        dir=tmp_path,
+        timeout=60,
+        cache_dir=test_cache_dir,
+        force=True,
+        executor="async",
+    ) as tester:
+        timer.start()
+        try:
+            tester.run_tests(max_workers=1)
+        finally:
+            timer.cancel()
+
+    assert tester.interrupted is True
+    assert time.time() - start < 20
+    assert signal.getsignal(signal.SIGINT) == previous
+
+
+def test_interrupted_run_cancels_pending(tmp_path):
+    """Test that a stop requested off the main thread cancels queued notebooks"""
+    for i in range(3):
+        NotebookCreator.create_notebook(
+            ["import time\ntime.sleep(2)"], f"slow{i}.ipynb", tmp_path
+        )
+    with NotebookTester(
+        dir=tmp_path,
+        timeout=30,
+        cache_dir=tmp_path / ".cache",
+        executor="thread",
+    ) as tester:
+        timer = threading.Timer(1, setattr, (tester, "interrupted", True))
+        timer.start()
+        try:
+            tester.run_tests(max_workers=1)
+        finally:
+            timer.cancel()
+
+    assert tester.interrupted is True
+    assert tester.successful + tester.failed + tester.no_more_time < 3
+
+
+def test_import_skips_jupyter_stack():
+    """Test that importing the CLI does not pull in nbclient"""
+    code = "import sys, notebooktester.cli; assert 'nbclient' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_default_workers(monkeypatch):
+    """Test that the default pool oversubscribes CPUs but not notebooks"""
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    assert _default_workers(100) == 6
+    assert _default_workers(3) == 3
+    assert _default_workers(0) == 1
+    monkeypatch.setattr(os, "cpu_count", lambda: 128)
+    assert _default_workers(1000) == 64
+
+
+def test_stats_cache_roundtrip():
+    """Test that failed stats survive serialization, including the inf runtime"""
+    stats = NotebookStats(
+        notebook_path=Path("nb.ipynb"),
+        last_modified=1.0,
+        success=False,
+        message="boom",
+        timeout=1,
+        execution_time=float("inf"),
+        cached=False,
+    )
+    restored = NotebookStats.from_dict(_json_loads(_json_dumps(stats.to_dict())))
+
+    assert restored == stats
+
+
+def test_result_cache_keeps_loaded_stats_in_memory(tmp_path):
+    """Test that repeated loads skip SQLite until the entry is written again"""
+    cache = main.ResultCache(tmp_path / "cache.sqlite")
+    stats = NotebookStats(
+        notebook_path=Path("nb.ipynb"),
+        last_modified=1.0,
+        success=True,
+        message="Success",
+        timeout=1,
+        execution_time=0.5,
+        cached=False,
+    )
+    cache.put("nb", stats)
+    first = cache.load("nb")
+    assert first is not None and first.cached is True
+    assert cache.load("nb") is first
+
+    cache.put("nb", replace(stats, message="Changed"))
+    changed = cache.load("nb")
+    assert changed is not None and changed.message == "Changed"
+    cache.close()
+
+
+def test_find_notebooks_skips_checkpoints(tmp_path):
+    """Test that checkpoint and VCS directories are pruned from discovery"""
+    checkpoints = tmp_path / "sub" / ".ipynb_checkpoints"
+    checkpoints.mkdir(parents=True)
+    (checkpoints / "nb-checkpoint.ipynb").write_text("{}")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "stale.ipynb").write_text("{}")
+    (tmp_path / "sub" / "nb.ipynb").write_text("{}")
+    (tmp_path / "notes.txt").write_text("")
+
+    with NotebookTester(dir=tmp_path, cache_dir=tmp_path / ".cache") as tester:
+        assert tester.find_notebooks() == [tmp_path / "sub" / "nb.ipynb"]
+
+
+def test_discovery_reuses_unchanged_listings(tmp_path, monkeypatch):
+    """Test that unchanged directories are not listed again, but still re-stat'ed"""
+    nb = tmp_path / "sub" / "nb.ipynb"
+    nb.parent.mkdir()
+    nb.write_text("{}")
+    for directory in (tmp_path, nb.parent):
+        os.utime(directory, (time.time() - 60, time.time() - 60))
+    with NotebookTester(dir=tmp_path, cache_dir=tmp_path.parent / ".cache") as tester:
+        assert tester.find_notebooks() == [nb]
+
+        nb.write_text('{"cells": []}')
+        with monkeypatch.context() as m:
+            m.setattr(os, "scandir", None)  # any listing would fail now
+            (found,) = tester._discover_notebooks()
+        assert found == (nb, nb.stat().st_mtime, nb.stat().st_size)
+
+        (nb.parent / "new.ipynb").write_text("{}")
+        assert tester.find_notebooks() == [nb, nb.parent / "new.ipynb"]
+
+
+def test_discovery_skips_unreadable_directories(tmp_path, monkeypatch):
+    """Test that a directory that can't be listed doesn't stop discovery"""
+    readable = NotebookCreator.create_notebook(["x = 1"], "a.ipynb", tmp_path)
+    locked = tmp_path / "locked"
+    locked.mkdir()
+    NotebookCreator.create_notebook(["x = 1"], "b.ipynb", locked)
+    scandir = os.scandir
+
+    def deny_locked(path):
+        if os.fspath(path) == os.fspath(locked):
+            raise PermissionError(13, "Permission denied", os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", deny_locked)
+    with NotebookTester(dir=tmp_path, cache_dir=tmp_path.parent / ".cache") as tester:
+        assert tester.find_notebooks() == [readable]
+
+
+def test_reuse_kernels(tmp_path, monkeypatch):
+    """Test that a reused kernel is reset and moved to each notebook's directory"""
+    shutdown_loops = []
+    shutdown_kernel = main._shutdown_kernel
+
+    async def record_loop(km):
+        shutdown_loops.append(asyncio.get_running_loop())
+        await shutdown_kernel(km)
+
+    monkeypatch.setattr(main, "_shutdown_kernel", record_loop)
+    (tmp_path / "sub").mkdir()
+    first = NotebookCreator.create_notebook(["leaked = 1"], "first.ipynb", tmp_path)
+    second = NotebookCreator.create_notebook(
+        [
+            "assert 'leaked' not in dir()",
+            "import os\nassert os.path.basename(os.getcwd()) == 'sub'",
+        ],
+        "second.ipynb",
+        tmp_path / "sub",
+    )
+    tester = NotebookTester(
+        dir=tmp_path,
+        timeout=10,
+        cache_dir=tmp_path / ".cache",
+        force=True,
+        reuse_kernels=True,
+    )
+    with tester:
+        assert tester.test_notebook(first).success is True
+        (km,) = tester._local.idle_kernels["python3"]
+        result = tester.test_notebook(second)
+        assert result.success is True, result.message
+        # Same kernel served both notebooks and went back to the pool
+        assert tester._local.idle_kernels["python3"] == [km]
+        loop = tester._local.loop
+    assert not km.has_kernel
+    # shut down on the loop that started it, not a fresh one
+    assert shutdown_loops == [loop]
+
+
+def test_reuse_kernels_relative_dir(tmp_path, monkeypatch):
+    """Test that a reused kernel finds sibling directories of a relative path"""
+    monkeypatch.chdir(tmp_path)
+    for name in ("a", "b"):
+        (tmp_path / "rel" / name).mkdir(parents=True)
+        NotebookCreator.create_notebook(
+            [f"import os\nassert os.path.basename(os.getcwd()) == {name!r}"],
+            f"{name}.ipynb",
+            tmp_path / "rel" / name,
+        )
+    with NotebookTester(
+        dir=Path("rel"),
+        timeout=10,
+        cache_dir=tmp_path / ".cache",
+        force=True,
+        executor="thread",
+        reuse_kernels=True,
+    ) as tester:
+        tester.run_tests(max_workers=1)
+
+    assert tester.successful == 2
+    assert tester.failed == 0
+
+
+def test_cleanup_registered_once(tmp_path, monkeypatch):
+    """Test that repeated runs don't pile up exit handlers for one tester"""
+    NotebookCreator.create_notebook(["x = 1"], "nb.ipynb", tmp_path)
+    registered = []
+    monkeypatch.setattr(
+        main.atexit, "register", lambda f, *a: registered.append(f) or f
+    )
+    monkeypatch.setattr(main.atexit, "unregister", registered.remove)
+    with NotebookTester(
+        dir=tmp_path,
+        timeout=10,
+        cache_dir=tmp_path / ".cache",
+        force=True,
+        executor="thread",
+        reuse_kernels=True,
+    ) as tester:
+        for _ in range(3):
+            tester.run_tests(max_workers=1)
+        assert [f for f in registered if getattr(f, "__self__", None) is tester] == [
+            tester._cleanup_at_exit
+        ]
+    assert not [f for f in registered if getattr(f, "__self__", None) is tester]
+
+
+@pytest.mark.parametrize("executor", ["thread", "async"])
+def test_executor_reuses_kernels(tmp_path, monkeypatch, executor):
+    """Test that workers draw their kernels from a pre-started, bounded pool"""
+    created = []
+
+    class CountingKernelManager(AsyncKernelManager):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(main, "AsyncKernelManager", CountingKernelManager)
+    for i in range(4):
+        NotebookCreator.create_notebook([f"x = {i}"], f"nb{i}.ipynb", tmp_path)
+    with NotebookTester(
+        dir=tmp_path,
+        timeout=10,
+        cache_dir=tmp_path / ".cache",
+        force=True,
+        executor=executor,
+        reuse_kernels=True,
+    ) as tester:
+        tester.run_tests(max_workers=2)
+
+    assert tester.successful == 4
+    assert len(created) == 2
+    assert not any(km.has_kernel for km in created)  # All shut down afterwards
 
-    # Run with force=True
-    result3 = force_tester.test_notebook(basic_nb)
-    assert result3.cached is False  # Should not use cache when forced
+
+def test_timed_out_notebook_is_cached(tmp_path):
+    """Test that a timeout is not retried until the timeout is increased"""
+    timeout_nb = NotebookCreator.create_timeout_notebook(tmp_path)
+    with NotebookTester(
+        dir=tmp_path, timeout=1, cache_dir=tmp_path / ".cache"
+    ) as tester:
+        first = tester.test_notebook(timeout_nb)
+    assert first.timed_out is True
+
+    with NotebookTester(
+        dir=tmp_path, timeout=1, cache_dir=tmp_path / ".cache"
+    ) as retry:
+        second = retry.test_notebook(timeout_nb)
+    assert second.cached is True
+    assert second.timed_out is True
+
+
+def test_read_notebook_drops_outputs(tmp_path):
+    """Test that the fast reader joins sources and drops outputs and markdown"""
+    nb = nbformat.v4.new_notebook()
+    nb.cells.append(nbformat.v4.new_markdown_cell("# Title"))
+    cell = nbformat.v4.new_code_cell("x = 1\nx")
+    cell.outputs = [nbformat.v4.new_output("execute_result", data={"text/plain": "1"})]
+    cell.execution_count = 1
+    nb.cells.append(cell)
+    path = tmp_path / "outputs.ipynb"
+    nbformat.write(nb, path)
+
+    fast = _read_notebook(path)
+    slow = _read_notebook(path, validate=True)
+
+    assert len(fast.cells) == 1
+    assert fast.cells[0].source == slow.cells[1].source == "x = 1\nx"
+    assert fast.cells[0].outputs == []
+    assert fast.cells[0].execution_count is None
+
+
+def test_longest_notebooks_run_first(tmp_path, monkeypatch):
+    """Test that notebooks are dispatched by descending runtime of their last run"""
+    paths = [
+        NotebookCreator.create_notebook(["x = 1"], f"{name}.ipynb", tmp_path)
+        for name in ("fast", "slow", "new")
+    ]
+    order = []
+    with NotebookTester(
+        dir=tmp_path, timeout=10, cache_dir=tmp_path / ".cache", executor="thread"
+    ) as tester:
+        for path, runtime in zip(paths, (1.0, 5.0)):
+            stats = NotebookStats(path, 0.0, False, "boom", 10, runtime, False)
+            tester.cache.put(tester._get_cache_key(path), stats)
+
+        monkeypatch.setattr(
+            tester,
+            "_run_in_executor",
+            lambda jobs, *args: order.extend(path.stem for path, *_ in jobs),
+        )
+        tester.run_tests(max_workers=1)
+
+    assert order == ["new", "slow", "fast"]
+
+
+def test_empty_notebook_skips_kernel(tmp_path, monkeypatch, tmp_tester):
+    """Test that a notebook without code succeeds without starting a kernel"""
+    path = NotebookCreator.create_notebook(["", "  \n"], "empty.ipynb", tmp_path)
+
+    def no_kernel(*args, **kwargs):
+        raise AssertionError("no kernel should be started")
+
+    monkeypatch.setattr(main, "NotebookClient", no_kernel)
+    result = tmp_tester.test_notebook(path)
+
+    assert result.success is True
+    assert result.cached is False
+
+
+def _no_kernel(monkeypatch):
+    """Make any attempt to execute a notebook fail the test"""
+    main._import_jupyter()
+
+    async def no_kernel(*args, **kwargs):
+        raise AssertionError("no kernel should be started")
+
+    monkeypatch.setattr(main.NotebookClient, "async_execute", no_kernel)
+
+
+def test_syntax_error_skips_kernel(tmp_path, monkeypatch, tmp_tester):
+    """Test that a notebook that can't compile fails without starting a kernel"""
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [
+        nbformat.v4.new_markdown_cell("# Intro"),
+        nbformat.v4.new_code_cell("%matplotlib inline\n!ls"),
+        nbformat.v4.new_code_cell("def broken(:\n    pass"),
+    ]
+    path = tmp_path / "syntax.ipynb"
+    nbformat.write(nb, path)
+
+    _no_kernel(monkeypatch)
+    result = tmp_tester.test_notebook(path)
+
+    assert result.success is False
+    # counted like the notebook shows it, markdown included
+    assert result.message.startswith("SyntaxError in cell 3")
+
+
+def test_syntax_precheck_needs_same_interpreter(tmp_path, monkeypatch, tmp_tester):
+    """Test that cells are left to a kernel running another interpreter"""
+    monkeypatch.setattr(main, "_kernel_runs_this_python", lambda name: False)
+    path = NotebookCreator.create_notebook(
+        ["def broken(:\n    pass"], "syntax.ipynb", tmp_path
+    )
+
+    result = tmp_tester.test_notebook(path)
+
+    # the kernel, not the pre-check, reported the error
+    assert result.success is False
+    assert not result.message.startswith("SyntaxError in cell")
+
+
+def test_kernel_runs_this_python(monkeypatch):
+    """Test that only kernels started with this interpreter are trusted"""
+    from jupyter_client.kernelspec import KernelSpec, KernelSpecManager
+
+    def spec_with(executable):
+        return lambda self, name: KernelSpec(argv=[executable, "-m", "ipykernel"])
+
+    for executable, expected in [
+        ("python", True),
+        (sys.executable, True),
+        ("/opt/python3.99/bin/python3.99", False),
+    ]:
+        main._kernel_runs_this_python.cache_clear()
+        monkeypatch.setattr(KernelSpecManager, "get_kernel_spec", spec_with(executable))
+        assert main._kernel_runs_this_python("python3") is expected
+    main._kernel_runs_this_python.cache_clear()
+
+
+@pytest.mark.parametrize("tag", ["raises-exception", "skip-execution"])
+def test_syntax_error_in_tagged_cell_is_allowed(tmp_path, tag, tmp_tester):
+    """Test that cells nbclient skips or lets fail are not pre-checked"""
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [
+        nbformat.v4.new_code_cell("def broken(:\n    pass", metadata={"tags": [tag]}),
+        nbformat.v4.new_code_cell("x = 1"),
+    ]
+    path = tmp_path / "demo.ipynb"
+    nbformat.write(nb, path)
+
+    result = tmp_tester.test_notebook(path)
+
+    assert result.success is True, result.message
+
+
+def test_cached_run_skips_executor(tmp_path, monkeypatch, tmp_tester):
+    """Test that a fully cached run never starts a worker pool"""
+    NotebookCreator.create_basic_notebook(tmp_path)
+    with NotebookTester(
+        dir=tmp_path, timeout=10, cache_dir=tmp_path / ".cache", executor="thread"
+    ) as first_run:
+        first_run.run_tests(max_workers=1)
+
+    def no_executor(*args):
+        raise AssertionError("cached notebooks should not reach the executor")
+
+    monkeypatch.setattr(tmp_tester, "_create_executor", no_executor)
+    tmp_tester.run_tests(max_workers=1)
+
+    assert tmp_tester.successful == 1
+
+
+def test_cache_key_follows_current_directory(tmp_path, monkeypatch):
+    """Test that a relative path gets a key for the notebook it names now"""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    with NotebookTester(dir=tmp_path, cache_dir=tmp_path / ".cache") as tester:
+        monkeypatch.chdir(tmp_path / "a")
+        key_a = tester._get_cache_key(Path("nb.ipynb"))
+        monkeypatch.chdir(tmp_path / "b")
+        key_b = tester._get_cache_key(Path("nb.ipynb"))
+
+    assert key_a != key_b
+    assert key_b == tester._get_cache_key(tmp_path / "b" / "nb.ipynb")
+
+
+def test_cache_survives_non_code_edits(tmp_path, tmp_tester):
+    """Test that touching a notebook without changing its code keeps the cache"""
+    basic_nb = NotebookCreator.create_basic_notebook(tmp_path)
+    assert tmp_tester.test_notebook(basic_nb).cached is False
+
+    nb = nbformat.read(basic_nb, as_version=4)
+    nb.cells.append(nbformat.v4.new_markdown_cell("# Notes"))
+    nbformat.write(nb, basic_nb)
+    os.utime(basic_nb, (time.time() + 10, time.time() + 10))
+
+    assert tmp_tester.test_notebook(basic_nb).cached is True
+
+    nb.cells.append(nbformat.v4.new_code_cell("3 + 3"))
+    nbformat.write(nb, basic_nb)
+    os.utime(basic_nb, (time.time() + 20, time.time() + 20))
+
+    assert tmp_tester.test_notebook(basic_nb).cached is False
+
+
+def test_restored_older_copy_is_rerun(tmp_path, tmp_tester):
+    """Test that a notebook replaced by an older file is not served from cache"""
+    path = NotebookCreator.create_notebook(["x = 1"], "nb.ipynb", tmp_path)
+    assert tmp_tester.test_notebook(path).cached is False
+    assert tmp_tester.test_notebook(path).cached is True
+
+    NotebookCreator.create_notebook(["1 / 0"], "nb.ipynb", tmp_path)
+    os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+    result = tmp_tester.test_notebook(path)
+    assert result.cached is False
+    assert result.success is False
+
+
+def test_code_hash_ignores_outputs_and_metadata(tmp_path):
+    """Test that re-executing a notebook with saved outputs keeps its hash"""
+    nb = nbformat.v4.new_notebook()
+    nb.cells.append(nbformat.v4.new_code_cell("x = 1\nx"))
+    clean = tmp_path / "clean.ipynb"
+    nbformat.write(nb, clean)
+
+    nb.cells[0].outputs = [
+        nbformat.v4.new_output("execute_result", data={"image/png": "iVBORw0KGgo="})
+    ]
+    nb.cells[0].execution_count = 7
+    nb.cells[0].metadata["execution"] = {"shell.execute_reply": "2024-01-01"}
+    nb.metadata["kernelspec"] = {"name": "python3", "display_name": "Python 3"}
+    executed = tmp_path / "executed.ipynb"
+    nbformat.write(nb, executed)
+
+    assert main._code_hash(_read_notebook(clean)) == main._code_hash(
+        _read_notebook(executed)
+    )
+    # the cache check hashes the file directly and must agree with the run
+    assert main._file_code_hash(executed) == main._code_hash(_read_notebook(clean))
+
+
+def test_find_notebooks_missing_dir(tmp_path):
+    """Test that a directory that doesn't exist holds no notebooks"""
+    with NotebookTester(
+        dir=tmp_path / "missing", cache_dir=tmp_path / ".cache"
+    ) as tester:
+        assert tester.find_notebooks() == []
+
+
+def test_find_single_notebook(test_notebooks_dir, test_cache_dir):
+    """Test that a notebook path is discovered as itself"""
+    basic_nb = test_notebooks_dir / "basic.ipynb"
+    with NotebookTester(dir=basic_nb, cache_dir=test_cache_dir) as tester:
+        assert tester.find_notebooks() == [basic_nb]